@@ -26,9 +26,8 @@ MAX_OUTPUT_TOKENS_PER_TURN = 32768
 MAX_TURNS = 200
 
 
-def main():
-    """Main entry point for the CLI."""
-    # Parse command-line arguments
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the CLI arguments, reading sys.argv if argv is None."""
     parser = argparse.ArgumentParser(description="CLI for interacting with the Agent")
     parser.add_argument(
         "--workspace",
@@ -74,11 +73,25 @@ def main():
         default=False,
     )
 
-    args = parser.parse_args()
+    return parser.parse_args(argv)
+
+
+def main(args: argparse.Namespace | None = None):
+    """Main entry point for the CLI.
+
+    Args:
+        args: Parsed CLI arguments. If None, they are parsed from sys.argv.
+    """
+    if args is None:
+        args = parse_args()
 
     if os.path.exists(args.logs_path):
         os.remove(args.logs_path)
-    logger_for_agent_logs = logging.getLogger("agent_logs")
+    # Key the logger on the logs path so that agents running concurrently in
+    # the same process don't write into each other's log files.
+    logger_for_agent_logs = logging.getLogger(
+        f"agent_logs:{os.path.abspath(args.logs_path)}"
+    )
     logger_for_agent_logs.setLevel(logging.DEBUG)
     logger_for_agent_logs.addHandler(logging.FileHandler(args.logs_path))
     if not args.minimize_stdout_logs:
@@ -184,6 +197,10 @@ def main():
 
     except KeyboardInterrupt:
         console.print("\n[bold]Session interrupted. Exiting...[/bold]")
+    finally:
+        for handler in list(logger_for_agent_logs.handlers):
+            logger_for_agent_logs.removeHandler(handler)
+            handler.close()
 
     console.print("[bold]Goodbye![/bold]")
 
@@ -3,34 +3,114 @@
 Script to run the agent on a SWE-bench problem in a Docker container.
 
 This script loads a SWE-bench problem, starts a Docker container for it,
-and runs the agent inside the container by calling cli.py.
+and runs the agent inside the container through cli.py's main().
 """
 
-from functools import partial
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import os
 import logging
+import queue
+import shutil
+import statistics
 import threading
 import sys
 import json
 import argparse
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from multiprocessing import Pool, Manager
 import time
-import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from rich.console import Console
+from rich.logging import RichHandler
 from rich.panel import Panel
-from datasets import load_dataset
 
-from utils.docker_utils import MAX_DOCKER_CONCURRENCY, setup_workspace, stop_container
+from utils.docker_utils import (
+    MAX_DOCKER_CONCURRENCY,
+    check_local_docker_daemon,
+    chown_testbed,
+    ensure_registry_cache,
+    get_issue_image_name,
+    prefetch_images,
+    setup_workspace,
+    stop_container,
+    use_shared_image_dir,
+    stop_running_containers,
+)
 from utils.common import generate_patch
-from cli import main as cli_main
+from cli import main as cli_main, parse_args as parse_cli_args
 import uuid
 from utils.swebench_eval_utils import get_dataset_name, run_evaluation
 
 console = Console()
 
+# Containers are stopped in the background so that a rollout can hand back its
+# diff without waiting for `docker stop`. See finish_container_stops().
+_container_stopper = ThreadPoolExecutor(max_workers=MAX_DOCKER_CONCURRENCY)
+
+
+def finish_container_stops() -> None:
+    """Wait for the background container stops, then stop any leftover containers.
+
+    This must run before the interpreter starts shutting down: from then on,
+    thread pools (which stop_running_containers() uses) refuse new work.
+    """
+    _container_stopper.shutdown(wait=True)
+    # Also stop containers whose rollouts never got to it, e.g. on Ctrl+C
+    stop_running_containers()
+
+# Local Parquet copy of SWE-bench Verified, so that later runs can memory-map
+# it instead of loading and decoding the dataset through HuggingFace again.
+SWEBENCH_CACHE_PATH = Path(".cache/swe_verified.parquet")
+
+
+def load_swebench_shard(shard_id: int, shard_ct: int) -> list[dict]:
+    """Load the instance IDs and problem statements of a SWE-bench Verified shard."""
+    if not SWEBENCH_CACHE_PATH.exists():
+        # Imported lazily: datasets is slow to import and only needed to
+        # populate the cache.
+        from datasets import load_dataset
+
+        swebench_dataset = load_dataset("princeton-nlp/SWE-bench_Verified")["test"]  # pyright: ignore[reportIndexIssue]
+        SWEBENCH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_cache_path = SWEBENCH_CACHE_PATH.with_suffix(f".{uuid.uuid4().hex[:8]}.tmp")
+        swebench_dataset.to_parquet(tmp_cache_path)  # pyright: ignore
+        os.replace(tmp_cache_path, SWEBENCH_CACHE_PATH)
+
+    with pa.memory_map(str(SWEBENCH_CACHE_PATH)) as source:
+        table = pq.read_table(source, columns=["instance_id", "problem_statement"])
+    num_examples_per_shard = table.num_rows // shard_ct
+    return table.slice(
+        shard_id * num_examples_per_shard, num_examples_per_shard
+    ).to_pylist()
+
+
+def get_rollout_workspace(
+    workspace_base_path: Path, problem_id: str, rollout_idx: int
+) -> Path:
+    """Return the workspace directory of a single rollout."""
+    return workspace_base_path / problem_id / f"rollout_{rollout_idx}"
+
+
+def read_completed_rollout(workspace_path: Path) -> tuple[str, float] | None:
+    """Return the diff and agent duration of a rollout that already completed.
+
+    Completed rollouts are marked with a .done file holding the agent duration.
+    """
+    done_marker = workspace_path / ".done"
+    if not done_marker.exists():
+        return None
+    predictions = orjson.loads((workspace_path / "predictions.json").read_bytes())
+    return predictions[0]["model_patch"], float(done_marker.read_text())
+
+
 def run_eval_on_single_problem(problem_id: str, workspace_path: Path, console: Console):
+    logger = logging.getLogger(problem_id)
+    logger.info(f"Evaluating the generated diff in {workspace_path}...")
+    start_time = time.time()
     eval_file = None
 
     eval_outcomes = {
@@ -52,10 +132,11 @@ def run_eval_on_single_problem(problem_id: str, workspace_path: Path, console: C
         eval_file = workspace_path / f"augment-agent.{problem_id}.json"
         eval_dict = json.loads(eval_file.read_text())
         eval_outcomes["is_success"] = problem_id in eval_dict["resolved_ids"]
-        console.print(f"Evaluated {problem_id} successfully.")
+        logger.info(f"Evaluated {problem_id} successfully.")
     except FileNotFoundError as exc:
-        console.print(f"Failed to report results for {problem_id}")
-        console.print(exc)
+        logger.warning(f"Failed to report results for {problem_id}: {exc}")
+    eval_duration = time.time() - start_time
+    logger.info(f"Evaluation completed in {eval_duration:.2f}s.")
     return eval_outcomes
 
 
@@ -64,49 +145,44 @@ def run_agent_on_single_problem(
     problem_statement: str,
     rollout_idx: int,
     workspace_base_path: Path,
-    lock: threading.Lock,
     semaphore: threading.Semaphore,
-) -> tuple[str, float, dict]:
+) -> tuple[str, float]:
     """
     Run the agent on a single SWE-bench problem.
 
+    The generated diff is written to predictions.json in the rollout workspace,
+    ready to be evaluated with run_eval_on_single_problem.
+
     Args:
         problem_id: The ID of the problem
         problem_statement: The problem statement
-        lock: Threading lock for Docker operations
+        rollout_idx: The index of the candidate solution being generated
+        workspace_base_path: The base directory for all rollout workspaces
         semaphore: Threading semaphore for Docker operations
 
     Returns:
         dict: The diff data generated by the agent
         float: The time taken to generate the diff
-        dict: The evaluation outcomes
     """
-    console = Console()
-    logs_prefix = f"[bold blue]{problem_id}[/bold blue]"
+    logger = logging.getLogger(problem_id)
 
-    workspace_path = workspace_base_path / problem_id / f"rollout_{rollout_idx}"
+    workspace_path = get_rollout_workspace(workspace_base_path, problem_id, rollout_idx)
     output_file = workspace_path / "agent_logs.txt"
 
-    # Ensure workspace directory exists
-    workspace_path.mkdir(parents=True, exist_ok=True)
+    # Skip the Docker and agent work entirely if a previous run finished this rollout
+    completed_rollout = read_completed_rollout(workspace_path)
+    if completed_rollout is not None:
+        logger.info(f"Rollout {rollout_idx} already completed in {workspace_path}")
+        return completed_rollout
 
     # Start the Docker container
     container_id = None
 
     try:
-        env, container_id = setup_workspace(workspace_path, problem_id, lock, semaphore)
-        console.print(f"{logs_prefix} Docker container started with ID: {container_id}")
-
-        # Set environment variables
-        for key, value in env.items():
-            os.environ[key] = value
-
-        # Save original sys.argv
-        original_argv = sys.argv.copy()
+        container_id = setup_workspace(workspace_path, problem_id, semaphore)
+        logger.info(f"Docker container started with ID: {container_id}")
 
-        # Create new sys.argv for cli.py
         cli_args = [
-            "cli.py",
             "--workspace",
             str(workspace_path),
             "--problem-statement",
@@ -122,83 +198,95 @@ def run_agent_on_single_problem(
         if output_file:
             cli_args.extend(["--logs-path", str(output_file)])
 
-        # Replace sys.argv with our custom arguments
-        sys.argv = cli_args
-
         # Run the agent via cli.py
-        console.print(f"{logs_prefix} Starting agent run...")
+        logger.info("Starting agent run...")
         start_time = time.time()
-        cli_main()
+        cli_main(parse_cli_args(cli_args))
         agent_duration = time.time() - start_time
-        console.print(f"{logs_prefix} Agent run completed in {agent_duration:.2f}s.")
-
-        # Restore original sys.argv
-        sys.argv = original_argv
+        logger.info(f"Agent run completed in {agent_duration:.2f}s.")
 
-        # Generate patch after the agent has completed its work
+        # Generate patch after the agent has completed its work. Its last
+        # command may have timed out before handing the files back to us.
+        chown_testbed(container_id)
         repo_path = str(workspace_path)
-        console.print(f"Generating patch in {repo_path}")
+        logger.info(f"Generating patch in {repo_path}")
         diff = generate_patch(repo_path)
 
-        
-        with (workspace_path / "predictions.json").open("w") as f:
-            json.dump(
-                [
-                    {
-                        "instance_id": problem_id,
-                        "model_name_or_path": "augment-agent",
-                        "model_patch": diff,
-                        # "search_tool_calls": self.num_search_tool_calls,
-                    }
-                ],
-                f,
-                indent=2,
-            )
-            
-        # Also save to /evals folder
-        evals_dir = Path("./evals")
-        console.print(f"Saving predictions to {evals_dir / f'{problem_id}_predictions.json'}")
-        evals_dir.mkdir(exist_ok=True, parents=True)
-        with (evals_dir / f"{problem_id}_predictions.json").open("w") as f:
-            json.dump(
-                [
-                    {
-                        "instance_id": problem_id,
-                        "model_name_or_path": "augment-agent",
-                        "model_patch": diff,
-                        # "search_tool_calls": self.num_search_tool_calls,
-                    }
-                ],
-                f,
-                indent=2,
-            )
+        predictions = orjson.dumps(
+            [
+                {
+                    "instance_id": problem_id,
+                    "model_name_or_path": "augment-agent",
+                    "model_patch": diff,
+                    # "search_tool_calls": self.num_search_tool_calls,
+                }
+            ],
+            option=orjson.OPT_INDENT_2,
+        )
+        predictions_file = workspace_path / "predictions.json"
+        with predictions_file.open("wb") as f:
+            f.write(predictions)
+
+        # Mark the rollout as completed so that a resumed run can reuse it
+        (workspace_path / ".done").write_text(str(agent_duration))
     finally:
         # Stop and clean up the Docker container
         if container_id is not None:
-            console.print(f"{logs_prefix} Stopping Docker container...")
-            stop_container(container_id)
-            console.print(f"{logs_prefix} Docker container stopped")
-
-    # Evaluate the generated diff
-    console.print(f"{logs_prefix} Evaluating the generated diff...")
-    start_time = time.time()
-    eval_outcomes = run_eval_on_single_problem(problem_id, workspace_path, console)
-    eval_duration = time.time() - start_time
-    console.print(f"{logs_prefix} Evaluation completed in {eval_duration:.2f}s.")
+            logger.info("Stopping Docker container in the background...")
+            _container_stopper.submit(stop_container, container_id)
 
     assert diff is not None
-    return diff, agent_duration, eval_outcomes
-
-
-def should_process_issue(problem_id):
-    # Check if predictions file exists in evals directory
-    console.print(f"Checking if {problem_id} should be processed")
-    evals_dir = Path("./evals")
-    prediction_file = evals_dir / f"{problem_id}_predictions.json"
-    console.print(f"Prediction file: {prediction_file}")
-    
-    # Skip if file already exists
-    if prediction_file.exists():
+    return diff, agent_duration
+
+
+def collect_evaluated_examples(
+    pending: deque[tuple[dict, list[Future]]], wait: bool
+) -> list[dict]:
+    """Pop examples whose evaluations have finished, preserving their order.
+
+    Args:
+        pending: Queue of (diff data, evaluation futures) pairs, one per example
+        wait: Whether to block until all pending evaluations finish
+
+    Returns:
+        list[dict]: The diff data of the finished examples, with eval outcomes
+    """
+    evaluated = []
+    while pending and (wait or all(f.done() for f in pending[0][1])):
+        diff_data, eval_futures = pending.popleft()
+        try:
+            diff_data["eval_outcomes"] = tuple(f.result() for f in eval_futures)
+        except Exception as e:
+            console.print(f"Error evaluating example {diff_data['id']}: {str(e)}")
+            continue
+        evaluated.append(diff_data)
+    return evaluated
+
+
+def save_predictions_to_evals(evals_dir: Path, workspace_path: Path, problem_id: str) -> None:
+    """Copy a rollout's predictions to the evals directory.
+
+    A predictions file in the evals directory marks the problem as processed, so
+    this must only be called once the problem's results have been saved.
+    Otherwise a resumed run would skip the problem instead of finishing it.
+    """
+    evals_file = evals_dir / f"{problem_id}_predictions.json"
+    console.print(f"Saving predictions to {evals_file}")
+    shutil.copyfile(workspace_path / "predictions.json", evals_file)
+
+
+def get_processed_problem_ids(evals_dir: Path) -> set[str]:
+    """Return the IDs of the problems that already have predictions in evals_dir."""
+    suffix = "_predictions"
+    return {
+        prediction_file.stem[: -len(suffix)]
+        for prediction_file in evals_dir.glob(f"*{suffix}.json")
+    }
+
+
+def should_process_issue(problem_id: str, processed_problem_ids: set[str]) -> bool:
+    # Skip if a predictions file already exists in the evals directory
+    if problem_id in processed_problem_ids:
         console.print(f"Skipping {problem_id} - already processed (found in /evals)")
         return False
     console.print(f"Processing {problem_id}")
@@ -228,7 +316,7 @@ def main():
         "--num-processes",
         type=int,
         default=8,
-        help="Number of processes to use for each example",
+        help="Number of rollouts to run in parallel, across all examples",
     )
     parser.add_argument(
         "--num-candidate-solutions",
@@ -236,14 +324,44 @@ def main():
         default=8,
         help="Number of candidate solutions to generate for each example",
     )
+    parser.add_argument(
+        "--workspace-base-path",
+        type=str,
+        default=None,
+        help="Directory for the rollout workspaces. Reuse it to resume an interrupted run; defaults to a new directory under /tmp/workspace",
+    )
+    parser.add_argument(
+        "--use-registry-cache",
+        action="store_true",
+        default=False,
+        help="Pull images through a local pull-through cache of Docker Hub",
+    )
+    parser.add_argument(
+        "--shared-image-dir",
+        type=str,
+        default=None,
+        help="Directory shared between machines (e.g. a tmpfs or NFS mount) to save pulled images to and load them from",
+    )
+    parser.add_argument(
+        "--num-eval-workers",
+        type=int,
+        default=4,
+        help="Number of evaluations to run in parallel with the agent rollouts",
+    )
 
     args = parser.parse_args()
 
-    # Set up logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    )
+    # Initialize console
+    console = Console()
+
+    # Set up logging. Records are only enqueued by the threads that emit them,
+    # and a single listener thread renders them on the console.
+    log_queue: queue.Queue[logging.LogRecord] = queue.Queue()
+    logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+    console_handler = RichHandler(console=console, show_path=False)
+    console_handler.setFormatter(logging.Formatter("%(name)s - %(message)s"))
+    log_listener = QueueListener(log_queue, console_handler)
+    log_listener.start()
 
     # Check if ANTHROPIC_API_KEY is set
     if "ANTHROPIC_API_KEY" not in os.environ:
@@ -251,21 +369,19 @@ def main():
         print("Please set it to your Anthropic API key.")
         sys.exit(1)
 
-    # Initialize console
-    console = Console()
+    # Fail early rather than in every rollout
+    check_local_docker_daemon()
+
+    if args.use_registry_cache:
+        registry_cache_host = ensure_registry_cache()
+        console.print(f"Pulling images through the registry cache at {registry_cache_host}")
+    if args.shared_image_dir:
+        use_shared_image_dir(Path(args.shared_image_dir))
+        console.print(f"Sharing images through {args.shared_image_dir}")
 
     # Load the SWE-bench dataset
     console.print("Loading SWE-bench dataset...")
-    swebench_dataset = load_dataset("princeton-nlp/SWE-bench_Verified")[  # pyright: ignore[reportIndexIssue]
-        "test"
-    ].to_pandas()  # pyright: ignore
-
-    # Sharding
-    num_examples_per_shard = len(swebench_dataset) // args.shard_ct  # pyright: ignore[reportArgumentType]
-    examples = swebench_dataset.iloc[  # pyright: ignore[reportAttributeAccessIssue]
-        args.shard_id * num_examples_per_shard : (args.shard_id + 1)
-        * num_examples_per_shard
-    ]
+    examples = load_swebench_shard(args.shard_id, args.shard_ct)
 
     # Get the number of examples to run
     assert args.num_examples is None or args.num_examples <= len(examples), (
@@ -276,20 +392,22 @@ def main():
         f"Running on {num_examples} examples from shard {args.shard_id} out of {args.shard_ct} shards."
     )
     console.print(
-        f"We will generate {args.num_candidate_solutions} candidate solutions for each example with parallelism of {args.num_processes}."
+        f"We will generate {args.num_candidate_solutions} candidate solutions for each example, running {args.num_processes} rollouts in parallel."
     )
 
     # print out all example ids we'll be processing
     console.print(
         "Selected examples:",
-        "\n - " + "\n - ".join(examples.iloc[:num_examples]["instance_id"].tolist()),
+        "\n - " + "\n - ".join(example["instance_id"] for example in examples[:num_examples]),
     )
 
     # List to store all diff data
     all_diff_data = []
 
     # get workspace base dir
-    workspace_base_path = Path(f"/tmp/workspace/{uuid.uuid4().hex[:8]}").resolve()
+    workspace_base_path = Path(
+        args.workspace_base_path or f"/tmp/workspace/{uuid.uuid4().hex[:8]}"
+    ).resolve()
     console.print(f"Workspace base path: {workspace_base_path}")
 
     output_path = f"pre-ensemble_results_shard{args.shard_id}_of_{args.shard_ct}.jsonl"
@@ -297,63 +415,139 @@ def main():
     # Add timing for the entire process
     overall_start_time = time.time()
 
-    # Iterate over the specified number of examples
-    for i in range(num_examples):
+    # Rollouts spend their time waiting on Docker and the LLM API, so a thread
+    # pool gives us the parallelism without forking worker processes. Rollouts
+    # of all examples share the pool, so one slow example doesn't leave workers
+    # idle; Docker operations are throttled separately by the semaphore.
+    # Evaluations run on their own pool, overlapping with the remaining rollouts.
+    semaphore = threading.Semaphore(MAX_DOCKER_CONCURRENCY)
+    pending_evals: deque[tuple[dict, list[Future]]] = deque()
+    num_candidates = args.num_candidate_solutions
+
+    # Results are appended as examples finish, so that the results of an
+    # interrupted run are kept, and a resumed run (which skips the processed
+    # examples) adds the remaining ones to the same file.
+    results_file = open(output_path, "ab", buffering=1 << 20)
+
+    def save_evaluated_examples(wait: bool) -> None:
+        evaluated = collect_evaluated_examples(pending_evals, wait=wait)
+        if not evaluated:
+            return
+        all_diff_data.extend(evaluated)
+        # Flush the results after each example in case of failures
+        for diff_data in evaluated:
+            results_file.write(orjson.dumps(diff_data) + b"\n")
+        results_file.flush()
+        # Only mark the examples as processed once their results are saved, so
+        # that a resumed run evaluates the others again from their rollouts.
+        for diff_data in evaluated:
+            save_predictions_to_evals(
+                Path("./evals"),
+                get_rollout_workspace(workspace_base_path, diff_data["id"], num_candidates - 1),
+                diff_data["id"],
+            )
+
+    with (
+        results_file,
+        ThreadPoolExecutor(max_workers=args.num_processes) as executor,
+        ThreadPoolExecutor(max_workers=args.num_eval_workers) as eval_executor,
+    ):
         try:
-            problem = examples.iloc[i]
-            problem_id = problem["instance_id"]
-            problem_statement = problem["problem_statement"]
-
-            console.print(f"\nProcessing example {i + 1}/{num_examples}")
-
-            if should_process_issue(problem_id):
-                # Run the agent on the selected problem
-                with Manager() as manager:
-                    lock = manager.Lock()
-                    semaphore = manager.Semaphore(MAX_DOCKER_CONCURRENCY)
-                    with Pool(processes=args.num_processes) as pool:
-                        diffs = pool.starmap(
-                            partial(
-                                run_agent_on_single_problem,
-                                lock=lock,
-                                semaphore=semaphore,
-                                workspace_base_path=workspace_base_path,
-                            ),
-                            [
-                                (problem_id, problem_statement, rollout_idx)
-                                for rollout_idx in range(args.num_candidate_solutions)
-                            ],
-                        )
-                        diffs, agent_durations, eval_outcomes = zip(*diffs)
-                    median_duration = np.median(agent_durations)
-                    diff_data = {
-                        "id": problem_id,
-                        "instruction": problem_statement,
-                        "diffs": diffs,
-                        "agent_durations": agent_durations,
-                        "median_duration": median_duration,
-                        "eval_outcomes": eval_outcomes,
-                    }
-                    all_diff_data.append(diff_data)
-
-                # Save the results after each example in case of failures
-                with open(output_path, "w") as f:
-                    for diff_data in all_diff_data:
-                        f.write(json.dumps(diff_data) + "\n")
-
-                console.print(f"Completed example {i + 1}/{num_examples}")
-        except Exception as e:
-            console.print(f"Error processing example {i + 1}: {str(e)}")
-            continue
+            # List the evals directory once instead of checking each problem's file
+            processed_problem_ids = get_processed_problem_ids(Path("./evals"))
+            problems = [
+                problem
+                for problem in examples[:num_examples]
+                if should_process_issue(problem["instance_id"], processed_problem_ids)
+            ]
+            # Create the evals directory once, rather than in every rollout
+            Path("./evals").mkdir(parents=True, exist_ok=True)
+
+            # Rollouts run roughly in problem order, so pull the images of later
+            # problems while the first rollouts are running.
+            prefetch_images(
+                [get_issue_image_name(problem["instance_id"]) for problem in problems]
+            )
+
+            rollout_futures = {
+                executor.submit(
+                    run_agent_on_single_problem,
+                    problem["instance_id"],
+                    problem["problem_statement"],
+                    rollout_idx,
+                    workspace_base_path,
+                    semaphore,
+                ): (problem, rollout_idx)
+                for problem in problems
+                for rollout_idx in range(num_candidates)
+            }
+
+            # Rollout results per problem ID, indexed by rollout; None if it failed.
+            rollout_results: dict[str, dict[int, tuple[str, float, Future] | None]] = (
+                defaultdict(dict)
+            )
+            num_completed = 0
+            for rollout_future in as_completed(rollout_futures):
+                problem, rollout_idx = rollout_futures[rollout_future]
+                problem_id = problem["instance_id"]
+                results = rollout_results[problem_id]
+                try:
+                    diff, agent_duration = rollout_future.result()
+                    eval_future = eval_executor.submit(
+                        run_eval_on_single_problem,
+                        problem_id,
+                        get_rollout_workspace(workspace_base_path, problem_id, rollout_idx),
+                        console,
+                    )
+                    results[rollout_idx] = (diff, agent_duration, eval_future)
+                except Exception as e:
+                    console.print(f"Error processing {problem_id} rollout {rollout_idx}: {str(e)}")
+                    results[rollout_idx] = None
+                if len(results) < num_candidates:
+                    continue
+
+                # All rollouts of this example are done
+                del rollout_results[problem_id]
+                num_completed += 1
+                if any(result is None for result in results.values()):
+                    console.print(f"Error processing example {problem_id}; skipping it.")
+                    continue
+                diffs, agent_durations, eval_futures = zip(
+                    *(results[idx] for idx in range(num_candidates))
+                )
+                diff_data = {
+                    "id": problem_id,
+                    "instruction": problem["problem_statement"],
+                    "diffs": diffs,
+                    "agent_durations": agent_durations,
+                    "median_duration": statistics.median(agent_durations),
+                }
+                pending_evals.append((diff_data, list(eval_futures)))
+                console.print(f"Completed example {num_completed}/{len(problems)}: {problem_id}")
+                save_evaluated_examples(wait=False)
+
+            console.print("Waiting for the remaining evaluations to finish...")
+            save_evaluated_examples(wait=True)
+        except BaseException:
+            # Threads can't be killed, but the queued rollouts and evaluations
+            # can be dropped, so that only the running ones are waited for.
+            # This covers Ctrl+C as well as errors, e.g. writing the results.
+            console.print("Interrupted; cancelling the remaining rollouts and evaluations")
+            executor.shutdown(wait=False, cancel_futures=True)
+            eval_executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    log_listener.stop()
 
     all_durations = [d["median_duration"] for d in all_diff_data]
     # print out latencies at 25perc, min, max 75perc
     if len(all_durations) > 0:
-        console.print(f"Rollout latency min: {np.min(all_durations)}")
-        console.print(f"Rollout latency at 25perc: {np.percentile(all_durations, 25)}")
-        console.print(f"Rollout latency at median: {np.median(all_durations)}")
-        console.print(f"Rollout latency at 75perc: {np.percentile(all_durations, 75)}")
-        console.print(f"Rollout latency max: {np.max(all_durations)}")
+        sorted_durations = sorted(all_durations)
+        num_durations = len(sorted_durations)
+        console.print(f"Rollout latency min: {sorted_durations[0]}")
+        console.print(f"Rollout latency at 25perc: {sorted_durations[num_durations // 4]}")
+        console.print(f"Rollout latency at median: {sorted_durations[num_durations // 2]}")
+        console.print(f"Rollout latency at 75perc: {sorted_durations[3 * num_durations // 4]}")
+        console.print(f"Rollout latency max: {sorted_durations[-1]}")
 
     console.print(f"\nAll examples processed. Results saved to {output_path}")
     console.print("Done!")
@@ -400,4 +594,7 @@ python majority_vote_ensembler.py pre-ensemble_result_all_shards.jsonl --output_
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        finish_container_stops()
@@ -0,0 +1,134 @@
+"""Tests for resuming an interrupted run of run_agent_on_swebench_problem.py."""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import orjson
+import pytest
+
+import run_agent_on_swebench_problem as runner
+
+
+PROBLEM_ID = "astropy__astropy-12907"
+PROBLEM_IDS = [PROBLEM_ID, "django__django-11099", "sympy__sympy-20590"]
+
+
+@pytest.fixture
+def mock_rollout(tmp_path, monkeypatch):
+    """Replace the Docker and agent parts of a rollout with mocks."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "evals").mkdir()
+
+    def start_container(workspace_path, problem_id, semaphore):
+        # Like start_container, which creates the workspace directory
+        workspace_path.mkdir(parents=True, exist_ok=True)
+        return "container-id"
+
+    with (
+        patch.object(runner, "setup_workspace", side_effect=start_container) as setup_workspace,
+        patch.object(runner, "cli_main"),
+        patch.object(runner, "parse_cli_args"),
+        patch.object(runner, "generate_patch", return_value="the diff"),
+        patch.object(runner, "chown_testbed"),
+        patch.object(runner, "stop_container"),
+    ):
+        yield setup_workspace
+
+
+def run_rollout(workspace_base_path, rollout_idx):
+    return runner.run_agent_on_single_problem(
+        PROBLEM_ID, "problem statement", rollout_idx, workspace_base_path, MagicMock()
+    )
+
+
+class TestResume:
+    """Tests for reusing the rollouts of an interrupted run."""
+
+    def test_read_completed_rollout(self, tmp_path):
+        """Test that only rollouts with a .done marker are read back."""
+        assert runner.read_completed_rollout(tmp_path) is None
+
+        (tmp_path / "predictions.json").write_bytes(
+            orjson.dumps([{"instance_id": PROBLEM_ID, "model_patch": "the diff"}])
+        )
+        (tmp_path / ".done").write_text("12.5")
+        assert runner.read_completed_rollout(tmp_path) == ("the diff", 12.5)
+
+    def test_completed_rollout_is_reused(self, tmp_path, mock_rollout):
+        """Test that a completed rollout is not run again."""
+        workspace_base_path = tmp_path / "workspace"
+        diff, agent_duration = run_rollout(workspace_base_path, 0)
+        assert diff == "the diff"
+        assert mock_rollout.call_count == 1
+
+        assert run_rollout(workspace_base_path, 0) == (diff, agent_duration)
+        assert mock_rollout.call_count == 1
+
+    def test_partially_completed_problem_is_processed(self, tmp_path, mock_rollout):
+        """Test that finishing some rollouts doesn't mark the problem as processed."""
+        workspace_base_path = tmp_path / "workspace"
+        run_rollout(workspace_base_path, 0)
+
+        processed_problem_ids = runner.get_processed_problem_ids(tmp_path / "evals")
+        assert runner.should_process_issue(PROBLEM_ID, processed_problem_ids)
+
+        # Once all rollouts are done, the predictions mark it as processed
+        runner.save_predictions_to_evals(
+            tmp_path / "evals",
+            runner.get_rollout_workspace(workspace_base_path, PROBLEM_ID, 0),
+            PROBLEM_ID,
+        )
+        processed_problem_ids = runner.get_processed_problem_ids(tmp_path / "evals")
+        assert not runner.should_process_issue(PROBLEM_ID, processed_problem_ids)
+
+    def test_interrupted_run_is_resumed(self, tmp_path, mock_rollout, monkeypatch):
+        """Test that interrupting and resuming a run saves the results of every problem."""
+        workspace_base_path = tmp_path / "workspace"
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+        monkeypatch.setattr(
+            "sys.argv",
+            [
+                "run_agent_on_swebench_problem.py",
+                "--num-processes=1",
+                "--num-candidate-solutions=2",
+                f"--workspace-base-path={workspace_base_path}",
+            ],
+        )
+        problems = [
+            {"instance_id": problem_id, "problem_statement": "problem statement"}
+            for problem_id in PROBLEM_IDS
+        ]
+        # Interrupt the run when it gets to the last problem, while the
+        # evaluation of the one before is still running
+        interrupted = threading.Event()
+
+        def start_container(workspace_path, problem_id, semaphore):
+            if problem_id == PROBLEM_IDS[-1] and not interrupted.is_set():
+                interrupted.set()
+                raise KeyboardInterrupt
+            workspace_path.mkdir(parents=True, exist_ok=True)
+            return "container-id"
+
+        def run_eval(problem_id, workspace_path, console):
+            if problem_id == PROBLEM_IDS[-2]:
+                interrupted.wait(timeout=10)
+            return {"is_success": True}
+
+        mock_rollout.side_effect = start_container
+        with (
+            patch.object(runner, "load_swebench_shard", return_value=problems),
+            patch.object(runner, "check_local_docker_daemon"),
+            patch.object(runner, "prefetch_images"),
+            patch.object(runner, "run_eval_on_single_problem", side_effect=run_eval),
+        ):
+            with pytest.raises(KeyboardInterrupt):
+                runner.main()
+            runner.main()
+
+        results = [
+            orjson.loads(line)
+            for line in (tmp_path / "pre-ensemble_results_shard0_of_1.jsonl").read_bytes().splitlines()
+        ]
+        assert sorted(result["id"] for result in results) == sorted(PROBLEM_IDS)
+        # Only the rollouts of the interrupted problem were run again
+        assert mock_rollout.call_count == 2 * len(PROBLEM_IDS) + 1
@@ -1,7 +1,7 @@
 from copy import deepcopy
 from typing import Any, Optional
 from tools.bash_tool import create_bash_tool, create_docker_bash_tool
-from tools.search import SearchTool
+from tools.search import SEARCH_TOOL
 from utils.common import (
     DialogMessages,
     LLMTool,
@@ -95,8 +95,12 @@ try breaking down the task into smaller steps and call this tool multiple times.
             self.logger_for_agent_logs.info(
                 f"Enabling docker bash tool with container {docker_container_id}"
             )
+            container_workspace = workspace_manager.container_workspace
             bash_tool = create_docker_bash_tool(
                 container=docker_container_id,
+                # The file editing tools write to the container workspace from
+                # the host, so keep it owned by the current user.
+                owned_path=str(container_workspace) if container_workspace else None,
                 ask_user_permission=ask_user_permission,
             )
         else:
@@ -109,7 +113,7 @@ try breaking down the task into smaller steps and call this tool multiple times.
             StrReplaceEditorTool(workspace_manager=workspace_manager),
             SequentialThinkingTool(),
             self.complete_tool,
-            SearchTool(),
+            SEARCH_TOOL,
         ]
 
     def run_impl(
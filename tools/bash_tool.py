@@ -8,6 +8,7 @@ It provides a simple interface for running shell commands and getting their outp
 It also supports command filters for transforming commands before execution.
 """
 
+import os
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -132,15 +133,19 @@ class DockerCommandFilter(CommandFilter):
         self,
         container: str,
         user: Optional[str] = None,
+        owned_path: Optional[str] = None,
     ):
         """Initialize the Docker command filter.
 
         Args:
             container: Container ID or name
             user: Username to run commands as in the container
+            owned_path: Container path shared with the host, whose files are
+                handed back to the current user after each command
         """
         self.container = container
         self.user = user
+        self.owned_path = owned_path
 
     def filter_command(self, command: str) -> str:
         """Wrap a command for execution in a Docker container.
@@ -162,6 +167,21 @@ class DockerCommandFilter(CommandFilter):
         escaped_cmd = command.replace('"', '\\"')
         docker_parts.extend(["/bin/bash", "-l", "-c", f'"{escaped_cmd}"'])
 
+        # Commands run as root in the container, so files they create or
+        # rewrite in a shared path end up owned by root on the host, where the
+        # file editing tools can't write to them. Only chown the files that
+        # aren't ours yet: changing the owner of the others would also change
+        # their ctime and make git rehash the whole tree.
+        if self.owned_path and os.getuid() != 0:
+            docker_parts.extend(
+                [
+                    "; docker exec -u root",
+                    self.container,
+                    f"find {self.owned_path} -not -uid {os.getuid()}",
+                    f"-exec chown -h {os.getuid()}:{os.getgid()} {{}} +",
+                ]
+            )
+
         return " ".join(docker_parts)
 
 
@@ -406,6 +426,7 @@ def create_ssh_bash_tool(
 def create_docker_bash_tool(
     container: str,
     user: Optional[str] = None,
+    owned_path: Optional[str] = None,
     ask_user_permission: bool = True,
     cwd: Optional[Path] = None,
     additional_banned_command_strs: Optional[List[str]] = None,
@@ -415,6 +436,8 @@ def create_docker_bash_tool(
     Args:
         container: Container ID or name
         user: Username to run commands as in the container
+        owned_path: Container path shared with the host, whose files are
+            handed back to the current user after each command
         ask_user_permission: Whether to ask user permission for commands
         cwd: Default working directory for commands
 
@@ -424,6 +447,7 @@ def create_docker_bash_tool(
     docker_filter = DockerCommandFilter(
         container=container,
         user=user,
+        owned_path=owned_path,
     )
 
     return create_bash_tool(
@@ -1,11 +1,65 @@
-from typing import Optional, TypedDict
+import functools
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Optional, TypedDict
+import requests
+from requests.adapters import HTTPAdapter
 from exa_py import Exa
+from exa_py.websets.core.base import ExaJSONEncoder
 from utils.common import DialogMessages, LLMTool, ToolImplOutput
 from rich.console import Console
 
 console = Console()
 
-exa = Exa("79ce2f4b-4751-46c4-9148-e198630a99ec")
+
+class PooledExa(Exa):
+    """An Exa client that sends its requests over a shared keep-alive session.
+
+    The stock client calls requests.post() for every request, which opens a new
+    connection (and TLS handshake) each time. This overrides Exa.request(), so
+    exa-py is pinned to the version it was written against.
+    """
+
+    def __init__(self, api_key: str, max_connections: int = 64):
+        super().__init__(api_key)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+
+    def request(
+        self,
+        endpoint: str,
+        data: Any = None,
+        method: str = "POST",
+        params: Optional[dict[str, Any]] = None,
+        headers: Optional[dict[str, str]] = None,
+    ) -> Any:
+        request_headers = {**self.headers, **(headers or {})}
+        # Streaming and non-POST requests are rare; leave them to the stock client.
+        if (
+            method.upper() != "POST"
+            or not isinstance(data, dict)
+            or data.get("stream")
+            or request_headers.get("Accept") == "text/event-stream"
+        ):
+            return super().request(endpoint, data, method=method, params=params, headers=headers)
+        res = self.session.post(
+            self.base_url + endpoint,
+            # Serialized like the stock client, which handles Exa's own types
+            data=json.dumps(data, cls=ExaJSONEncoder),
+            headers=request_headers,
+            timeout=30,
+        )
+        if res.status_code >= 400:
+            raise ValueError(f"Request failed with status code {res.status_code}: {res.text}")
+        return res.json()
+
+
+@functools.lru_cache(maxsize=1)
+def _exa() -> PooledExa:
+    """Return the shared Exa client, creating it on first use."""
+    return PooledExa(os.environ.get("EXA_API_KEY", "79ce2f4b-4751-46c4-9148-e198630a99ec"))
 
 class SearchResult(TypedDict):
     """A search result."""
@@ -18,6 +72,23 @@ class AuxiliaryData(TypedDict):
     query: str
     titles: list[str]
 
+@dataclass(frozen=True)
+class SearchResultContent:
+    """A search result together with the text content of the page."""
+    title: Optional[str]
+    url: str
+    text: Optional[str]
+
+
+@functools.lru_cache(maxsize=256)
+def _exa_fetch(query: str, num_results: int) -> tuple[SearchResultContent, ...]:
+    """Search the web with Exa, caching the results of repeated queries."""
+    response = _exa().search_and_contents(query, num_results=num_results, text={"max_characters": 2000})
+    return tuple(
+        SearchResultContent(title=result.title, url=result.url, text=result.text)
+        for result in response.results
+    )
+
 
 class SearchTool(LLMTool):
     """A tool for searching the web."""
@@ -61,8 +132,7 @@ class SearchTool(LLMTool):
         query = tool_input["query"]
         num_results = tool_input.get("num_results", 5)
         try:
-            result= exa.search_and_contents(query, num_results=num_results, text= {"max_characters": 2000})
-            results = result.results
+            results = _exa_fetch(str(query), int(num_results))
             # console.print(f"Search results: {results[0]}")
             
             if not results:
@@ -76,13 +146,11 @@ class SearchTool(LLMTool):
                     }
                 )
             
-            # Format the results as a nicely formatted string
-            formatted_results = []
-            for i, result in enumerate(results, 1):
-                formatted_results.append(f"{i}. {result.title}\n   URL: {result.url} \n   Content: {result.text}")
-            
-            # Join all results into a single string
-            formatted_output = "\n\n".join(formatted_results)
+            # Format the results as a single, nicely formatted string
+            formatted_output = "\n\n".join(
+                f"{i}. {result.title}\n   URL: {result.url} \n   Content: {result.text}"
+                for i, result in enumerate(results, 1)
+            )
             
             return ToolImplOutput(
                 tool_output=formatted_output,
@@ -91,7 +159,6 @@ class SearchTool(LLMTool):
                     "success": True,
                     "query": query,
                     "num_results": len(results),
-                    "raw_results": formatted_results 
                 }
             )
         except Exception as e:
@@ -100,3 +167,7 @@ class SearchTool(LLMTool):
                 tool_result_message=f"Error searching for '{query}': {str(e)}",
                 auxiliary_data={"success": False, "query": query}
             )
+
+
+# SearchTool holds no per-agent state, so all agents share this instance.
+SEARCH_TOOL = SearchTool()
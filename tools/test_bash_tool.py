@@ -434,6 +434,19 @@ def test_command_with_timeout():
     assert output.auxiliary_data["success"]
 
 
+@patch("os.getgid", return_value=1000)
+@patch("os.getuid", return_value=1000)
+def test_docker_filter_chowns_owned_path(mock_getuid, mock_getgid):
+    """Test that files in the owned path are handed back to the current user."""
+    docker_filter = DockerCommandFilter(container="container-id", owned_path="/testbed")
+
+    assert docker_filter.filter_command("ls") == (
+        'docker exec container-id /bin/bash -l -c "ls"'
+        " ; docker exec -u root container-id"
+        " find /testbed -not -uid 1000 -exec chown -h 1000:1000 {} +"
+    )
+
+
 # These will pass, but don't run in CI.
 @pytest.mark.xfail
 class TestWithRealContainer(unittest.TestCase):
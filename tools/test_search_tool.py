@@ -5,10 +5,11 @@ including query execution and result handling.
 """
 
 import unittest
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 import pytest
 
-from tools.search import SearchTool, ToolImplOutput
+from tools.search import SearchTool, ToolImplOutput, _exa_fetch
 
 
 class SearchToolTest(unittest.TestCase):
@@ -18,19 +19,22 @@ class SearchToolTest(unittest.TestCase):
         """Set up test fixtures."""
         # Create the search tool
         self.search_tool = SearchTool()
+
+        # Make sure results cached by other tests are not reused
+        _exa_fetch.cache_clear()
         
         # Create a patch for the Exa search method
-        self.exa_search_patch = patch('tools.search.exa.search')
-        self.mock_exa_search = self.exa_search_patch.start()
+        self.exa_search_patch = patch('tools.search._exa')
+        self.mock_exa_search = self.exa_search_patch.start().return_value.search_and_contents
         
         # Sample search results
         self.sample_results = [
-            {"title": "Test Result 1", "url": "https://example.com/1"},
-            {"title": "Test Result 2", "url": "https://example.com/2"},
+            SimpleNamespace(title="Test Result 1", url="https://example.com/1", text="Content 1"),
+            SimpleNamespace(title="Test Result 2", url="https://example.com/2", text="Content 2"),
         ]
         
         # Set up the mock to return sample results
-        self.mock_exa_search.return_value = self.sample_results
+        self.mock_exa_search.return_value = SimpleNamespace(results=self.sample_results)
 
         # self.mock_exa_tool_result = ToolImplOutput(
         #     output=self.sample_results,
@@ -59,8 +63,10 @@ class SearchToolTest(unittest.TestCase):
         print("Result", result)
         print(type(result))
 
-        # Check that exa.search was called with the correct parameters
-        self.mock_exa_search.assert_called_once_with("python testing", num_results=2)
+        # Check that exa.search_and_contents was called with the correct parameters
+        self.mock_exa_search.assert_called_once_with(
+            "python testing", num_results=2, text={"max_characters": 2000}
+        )
         
         # Check the result
         self.assertEqual(result.tool_result_message, "Searched for 'python testing' and found 2 results.")
@@ -71,7 +77,7 @@ class SearchToolTest(unittest.TestCase):
     def test_run_impl_no_results(self):
         """Test handling when no results are found."""
         # Set up the mock to return empty results
-        self.mock_exa_search.return_value = []
+        self.mock_exa_search.return_value = SimpleNamespace(results=[])
         
         # Run the search tool
         result = self.search_tool.run_impl({
@@ -113,13 +119,25 @@ class SearchToolTest(unittest.TestCase):
         print("Result", result)
         print(type(result))
         
-        # Check that exa.search was called with the default num_results
-        # Assuming default is 10, adjust as needed
-        self.mock_exa_search.assert_called_once_with("default test", num_results=10)
+        # Check that exa.search_and_contents was called with the default num_results
+        self.mock_exa_search.assert_called_once_with(
+            "default test", num_results=5, text={"max_characters": 2000}
+        )
         
         # Check the result
         self.assertEqual(result.auxiliary_data["num_results"], 2)
 
+    def test_repeated_query_is_cached(self):
+        """Test that repeating a query reuses the cached results."""
+        first = self.search_tool.run_impl({"query": "cached query", "num_results": 2})
+        second = self.search_tool.run_impl({"query": "cached query", "num_results": 2})
+
+        # Check that Exa was only queried once
+        self.mock_exa_search.assert_called_once_with(
+            "cached query", num_results=2, text={"max_characters": 2000}
+        )
+        self.assertEqual(first.tool_output, second.tool_output)
+
     def test_get_tool_start_message(self):
         """Test getting the tool start message."""
         message = self.search_tool.get_tool_start_message({
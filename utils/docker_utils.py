@@ -1,22 +1,78 @@
 import docker
+import docker.auth
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import os
 import subprocess
+import threading
 import time
 import uuid
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any
 import platform
 import shutil
-from rich.console import Console
 
 from utils.common import generate_patch
-AUGMENT_ROOT = Path(__file__).parent.parent
 MAX_DOCKER_CONCURRENCY = 4
-console = Console()
+# Pulls are network-bound and don't load the daemon the way starting
+# containers does, so they are throttled separately.
+MAX_DOCKER_PULL_CONCURRENCY = 8
+_pull_semaphore = threading.Semaphore(MAX_DOCKER_PULL_CONCURRENCY)
+# One event per image, set once its pull has finished, so that each image is
+# only pulled once even when several problems use it.
+_pull_status: dict[str, threading.Event] = {}
+_pull_lock = threading.Lock()
+# Local pull-through cache of Docker Hub, see ensure_registry_cache().
+REGISTRY_CACHE_CONTAINER_NAME = "augment-registry-cache"
+REGISTRY_CACHE_PORT = 5000
+_registry_cache_host: str | None = None
+# Directory shared between machines that images are saved to, see
+# use_shared_image_dir().
+_shared_image_dir: Path | None = None
+# Saves pulled images to the shared directory in the background. Pending saves
+# are finished before the process exits.
+_image_saver = ThreadPoolExecutor(max_workers=2)
+# IDs of the containers started by start_container that have not been stopped
+_running_container_ids: set[str] = set()
+CONTAINER_START_TIMEOUT = 60  # seconds
+logger = logging.getLogger(__name__)
+
+@functools.lru_cache(maxsize=1)
+def get_docker_client() -> docker.DockerClient:
+    """Return the Docker client shared by all Docker operations.
+
+    docker.from_env() re-reads the Docker config on every call, so the client
+    is only created once.
+    """
+    return docker.from_env()
+
+
+@functools.lru_cache(maxsize=None)
+def get_registry_auth_config(registry: str) -> dict:
+    """Resolve the credentials for a registry once, rather than on every pull.
+
+    Without an explicit auth config, each pull looks the credentials up again,
+    which runs the configured credential helper every time.
+    """
+    auth_configs = get_docker_client().api._auth_configs  # pyright: ignore[reportAttributeAccessIssue]
+    return docker.auth.resolve_authconfig(auth_configs, registry) or {}
+
+
+def _pull(image_name: str) -> Any:
+    """Pull an image, passing the cached credentials of its registry."""
+    registry, _ = docker.auth.resolve_repository_name(image_name)
+    return get_docker_client().images.pull(
+        image_name, auth_config=get_registry_auth_config(registry)
+    )
+
 
+@functools.lru_cache(maxsize=None)
 def get_repo_info(problem_id: str) -> dict:
-    """Extract repository information from the problem ID."""
+    """Extract repository information from the problem ID.
+
+    The result is cached and shared between callers, so don't modify it.
+    """
     parts = problem_id.split("__")
     if len(parts) != 2:
         raise ValueError(f"Invalid problem ID format: {problem_id}")
@@ -31,7 +87,8 @@ def get_repo_info(problem_id: str) -> dict:
         "clone_url": f"https://github.com/{repo_name}/{repo_name}.git"
     }
 
-def get_issue_image_name(problem_id: str, workspace: Path) -> str:
+@functools.lru_cache(maxsize=None)
+def get_issue_image_name(problem_id: str) -> str:
     """Fetch a docker image for the issue."""
     issue_key = problem_id.replace("__", "_1776_")
     return f"swebench/sweb.eval.x86_64.{issue_key}:latest"
@@ -41,11 +98,11 @@ def set_volume_permissions(container_id, volume_path: Path):
     """Make the host‑side volume path readable/writable by the current user."""
     # macOS / Docker‑Desktop: path already owned by current user
     if platform.system() == "Darwin" and os.access(volume_path, os.W_OK):
-        console.print(f"{volume_path} already writable; skipping chmod/chown.")
+        logger.info(f"{volume_path} already writable; skipping chmod/chown.")
         return
 
     my_uid, my_gid = os.getuid(), os.getgid()
-    console.print(f"Fixing permissions for {volume_path} to {my_uid}:{my_gid}")
+    logger.info(f"Fixing permissions for {volume_path} to {my_uid}:{my_gid}")
     env = os.environ.copy()
 
     try:
@@ -54,82 +111,349 @@ def set_volume_permissions(container_id, volume_path: Path):
             env=env,
         )
     except subprocess.CalledProcessError as e:
-        console.print(f"chmod failed on {volume_path}: {e}")
+        logger.warning(f"chmod failed on {volume_path}: {e}")
+
+    # Equivalent to `chown -R`, but spread over all cores: find lists the
+    # tree and xargs chowns batches of paths in parallel.
+    find = subprocess.Popen(
+        ["sudo", "find", volume_path.as_posix(), "-print0"],
+        stdout=subprocess.PIPE,
+        env=env,
+    )
+    assert find.stdout is not None
+    chown = subprocess.Popen(
+        [
+            "sudo",
+            "xargs",
+            "-0",
+            "-P",
+            str(os.cpu_count() or 1),
+            "-n",
+            "1000",
+            "chown",
+            "-h",  # Like chown -R, don't follow symlinks
+            f"{my_uid}:{my_gid}",
+        ],
+        stdin=find.stdout,
+        env=env,
+    )
+    find.stdout.close()  # Let find get SIGPIPE if xargs exits early
+    if chown.wait() != 0 or find.wait() != 0:
+        logger.warning(
+            f"chown failed on {volume_path}: find exited with {find.returncode},"
+            f" xargs with {chown.returncode}"
+        )
+
+
+def remove_in_background(path: Path) -> None:
+    """Move a directory out of the way and delete it in a background thread.
+
+    The rename is atomic and instant, so the path can be reused immediately
+    while the (possibly large) tree is deleted off the critical path.
+    """
+    trash = path.with_name(f"{path.name}.trash-{uuid.uuid4().hex}")
+    os.rename(path, trash)
+    threading.Thread(
+        target=shutil.rmtree, args=(trash,), kwargs={"ignore_errors": True}, daemon=True
+    ).start()
+
 
+def ensure_registry_cache() -> str:
+    """Start a local pull-through cache of Docker Hub and pull images through it.
+
+    The cache runs in a long-lived registry container that stores its layers in
+    a named volume, so layers are only downloaded from Docker Hub once per
+    machine. Returns the host of the cache registry.
+    """
+    global _registry_cache_host
+    client = get_docker_client()
     try:
-        subprocess.check_call(
-            ["sudo", "chown", "-R", f"{my_uid}:{my_gid}", volume_path.as_posix()],
-            env=env,
+        container = client.containers.get(REGISTRY_CACHE_CONTAINER_NAME)
+        if container.status != "running":
+            container.start()
+    except docker.errors.NotFound:  # type: ignore
+        logger.info(f"Starting registry cache {REGISTRY_CACHE_CONTAINER_NAME}")
+        container = client.containers.run(
+            "registry:2",
+            name=REGISTRY_CACHE_CONTAINER_NAME,
+            detach=True,
+            restart_policy={"Name": "always"},
+            environment={"REGISTRY_PROXY_REMOTEURL": "https://registry-1.docker.io"},
+            ports={"5000/tcp": ("127.0.0.1", REGISTRY_CACHE_PORT)},
+            volumes={
+                REGISTRY_CACHE_CONTAINER_NAME: {"bind": "/var/lib/registry", "mode": "rw"}
+            },
+        )
+    wait_for_container_ready(container)
+    _registry_cache_host = f"localhost:{REGISTRY_CACHE_PORT}"
+    return _registry_cache_host
+
+
+def pull_image(image_name: str) -> None:
+    """Pull a docker image, limiting the number of concurrent pulls.
+
+    Each image is pulled at most once per process: callers that ask for an image
+    that is already being pulled wait for that pull instead of starting another.
+    If the pull fails, the next caller retries it.
+
+    If the registry cache is enabled, the image is pulled through it and tagged
+    with its Docker Hub name, so that the SWE-bench harness finds it locally too.
+    """
+    while True:
+        with _pull_lock:
+            pulled = _pull_status.get(image_name)
+            if pulled is None:
+                pulled = _pull_status[image_name] = threading.Event()
+                break
+        pulled.wait()
+        # A failed pull removes its event, in which case we try again
+        if _pull_status.get(image_name) is pulled:
+            return
+
+    try:
+        _pull_image(image_name)
+    except BaseException:
+        with _pull_lock:
+            del _pull_status[image_name]
+        raise
+    finally:
+        pulled.set()
+
+
+def _pull_image(image_name: str) -> None:
+    if _shared_image_dir is not None:
+        ensure_image_loaded(image_name, _shared_image_dir)
+    else:
+        _pull_from_registry(image_name)
+
+
+def _pull_from_registry(image_name: str) -> None:
+    logger.info(f"Pulling image {image_name}")
+    with _pull_semaphore:
+        if _registry_cache_host is None:
+            _pull(image_name)
+            return
+        image = _pull(f"{_registry_cache_host}/{image_name}")
+    repository, tag = image_name.rsplit(":", 1)
+    image.tag(repository, tag)  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def use_shared_image_dir(image_dir: Path) -> None:
+    """Share pulled images with other machines through a shared directory.
+
+    Images are saved to the directory after they are pulled, and loaded from it
+    instead of pulled from the registry when another machine already saved
+    them. Put the directory on a shared tmpfs or fast network file system.
+    """
+    global _shared_image_dir
+    image_dir.mkdir(parents=True, exist_ok=True)
+    _shared_image_dir = image_dir
+
+
+def ensure_image_loaded(image_name: str, image_dir: Path) -> None:
+    """Make an image available locally, preferring a saved copy in image_dir."""
+    client = get_docker_client()
+    try:
+        client.images.get(image_name)
+        return
+    except docker.errors.ImageNotFound:  # type: ignore
+        pass
+
+    image_path = image_dir / (image_name.replace("/", "_").replace(":", "_") + ".tar")
+    if image_path.exists():
+        logger.info(f"Loading image {image_name} from {image_path}")
+        try:
+            with open(image_path, "rb") as f:
+                client.images.load(f)
+            return
+        except docker.errors.APIError as e:  # type: ignore
+            logger.warning(f"Failed to load {image_path}, pulling instead: {e}")
+
+    _pull_from_registry(image_name)
+    # Saving takes a while for multi-GB images; the containers waiting for this
+    # image only need the pull.
+    _image_saver.submit(_save_image, image_name, image_path)
+
+
+def _save_image(image_name: str, image_path: Path) -> None:
+    """Save a local image to image_path, for other machines to load."""
+    # Write to a temporary file first, so that other machines never load a
+    # partially written image.
+    tmp_path = image_path.with_name(f"{image_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in get_docker_client().images.get(image_name).save(named=True):
+                f.write(chunk)
+        os.replace(tmp_path, image_path)
+        logger.info(f"Saved image {image_name} to {image_path}")
+    except (OSError, docker.errors.APIError) as e:  # type: ignore
+        tmp_path.unlink(missing_ok=True)
+        logger.warning(f"Failed to save image {image_name} to {image_path}: {e}")
+
+
+def prefetch_images(image_names: list[str]) -> None:
+    """Pull images one after another in the background, ahead of their use.
+
+    A container that needs an image which is still being prefetched waits for
+    that pull instead of starting another one (see pull_image()).
+    """
+
+    def prefetch() -> None:
+        for image_name in image_names:
+            try:
+                pull_image(image_name)
+            except Exception as e:
+                logger.warning(f"Failed to prefetch image {image_name}: {e}")
+
+    # A daemon thread, so that pending prefetches don't delay exiting
+    threading.Thread(target=prefetch, daemon=True).start()
+
+
+def wait_for_container_ready(container: Any, timeout: float = CONTAINER_START_TIMEOUT) -> None:
+    """Poll a container until it is running and, if it has a healthcheck, healthy.
+
+    Polling replaces sleeping a fixed time, which is either too short for a slow
+    startup or wasted for a fast one.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        container.reload()
+        state = container.attrs["State"]
+        health = state.get("Health", {}).get("Status")
+        if state["Status"] == "running" and health in (None, "healthy"):
+            return
+        if state["Status"] in ("exited", "dead"):
+            raise RuntimeError(f"Container {container.id} exited during startup")
+        if health == "unhealthy":
+            raise RuntimeError(f"Container {container.id} is unhealthy")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Container {container.id} was not ready within {timeout}s")
+        time.sleep(0.1)
+
+
+def check_local_docker_daemon() -> None:
+    """Check that the Docker daemon runs on this Linux machine.
+
+    start_container shares /testbed through a volume bound to a host path,
+    which the daemon resolves on its own filesystem. With a remote daemon or
+    Docker Desktop (whose daemon runs in a VM), the rollouts would silently
+    work on a different directory than the one the agent edits.
+    """
+    docker_host = os.environ.get("DOCKER_HOST", "")
+    if docker_host and not docker_host.startswith("unix://"):
+        raise RuntimeError(
+            f"DOCKER_HOST={docker_host} points to a remote Docker daemon; "
+            "the rollouts need a daemon running on this machine"
+        )
+    operating_system = get_docker_client().info().get("OperatingSystem", "")
+    if platform.system() != "Linux" or "Docker Desktop" in operating_system:
+        raise RuntimeError(
+            f"The Docker daemon runs in {operating_system or 'a VM'}; the rollouts "
+            "need a Docker Engine running natively on this Linux machine"
         )
-    except subprocess.CalledProcessError as e:
-        console.print(f"chown failed on {volume_path}: {e}")
 
 
 def start_container(workspace: Path, problem_id: str, semaphore: Any) -> str:
     """Start a docker container for the issue."""
-    console.print(f"[{problem_id}] START: workspace={workspace}")
+    logger.info(f"[{problem_id}] START: workspace={workspace}")
     stop_container(f"sweb.augment.{problem_id}")
-    image_name = get_issue_image_name(problem_id, workspace)
-    console.print(f"Starting container for {problem_id}")
-    client = docker.from_env()
-    console.print(f"Pulling image {image_name}")
-    with semaphore:
-        client.images.pull(image_name)
-    console.print(f"Running docker run for {image_name} in {workspace}")
-
-    # host directory that is mounted into /testbed
-    host_testbed = (workspace / f"{problem_id}_testbed").resolve()
-    host_testbed.mkdir(parents=True, exist_ok=True)
-  
-
-    with semaphore:
-        console.print(f"Starting run for {image_name}")
-        container = client.containers.run(
-            name=f"sweb.augment.{problem_id}_{uuid.uuid4().hex[:8]}",
-            image=image_name,
-            detach=True,
-            command="bash -c 'git config --global user.email a && git config --global user.name a && git config --global --add safe.directory /testbed && git commit --allow-empty -m augment && sleep 7200'",  # Time out and die, eventually, if we are interrupted
-        )
-        console.print(f"Finished startup for {image_name}")
-    # Give it a second to start
-    time.sleep(5)
-
-     # Create a directory for the agent to work in
-    container_id = container.id
-    assert container_id is not None
-    console.print(f"Started {container_id} for {problem_id}")
-    
+    image_name = get_issue_image_name(problem_id)
+    logger.info(f"Starting container for {problem_id}")
+    client = get_docker_client()
+    pull_image(image_name)
+    logger.info(f"Running docker run for {image_name} in {workspace}")
+
+    # The agent works on the host copy of the repo at repo_link, which is also
+    # mounted into the container at /testbed, so both always see the same files.
     repo_link = workspace
 
     #  Make sure the target directory exists and is empty
     if repo_link.exists():
-        console.print(f"[{problem_id}] Removing existing repo at {repo_link}")
-        shutil.rmtree(repo_link, ignore_errors=True)
-    
+        logger.info(f"[{problem_id}] Removing existing repo at {repo_link}")
+        remove_in_background(repo_link)
+
     repo_link.mkdir(parents=True, exist_ok=True)
-    
-    # Copy files directly from container to local workspace
-    console.print(f"[{problem_id}] Copying files from container to {repo_link}")
+
+    # A named volume bound to repo_link: when a container mounts an empty named
+    # volume, Docker first copies the image's /testbed into it, which populates
+    # repo_link without copying the repo out of the container afterwards.
+    container_name = f"sweb.augment.{problem_id}_{uuid.uuid4().hex[:8]}"
+    testbed_volume = client.volumes.create(
+        name=f"{container_name}_testbed",
+        driver="local",
+        driver_opts={"type": "none", "o": "bind", "device": str(repo_link.resolve())},
+    )
+
+    container = None
     try:
-        subprocess.run(
-            ["docker", "cp", f"{container_id}:/testbed/.", str(repo_link)],
-            check=True
+        with semaphore:
+            logger.info(f"Starting run for {image_name}")
+            container = client.containers.run(
+                name=container_name,
+                image=image_name,
+                detach=True,
+                volumes={testbed_volume.name: {"bind": "/testbed", "mode": "rw"}},
+                command="sleep 7200",  # Time out and die, eventually, if we are interrupted
+            )
+            logger.info(f"Finished startup for {image_name}")
+        # Track the container before waiting on it, so that it is stopped at
+        # exit even if this rollout never gets to stop it.
+        _running_container_ids.add(container.id)  # pyright: ignore[reportArgumentType]
+        wait_for_container_ready(container)
+        # Configure git with a synchronous exec rather than in the container's
+        # command: once it returns, the container is ready for the agent.
+        git_setup = container.exec_run(
+            [
+                "bash",
+                "-c",
+                "git config --global user.email a && git config --global user.name a && git config --global --add safe.directory /testbed",
+            ]
         )
-    except subprocess.CalledProcessError as e:
-        console.print(f"[{problem_id}] Error copying from container: {e}")
+        if git_setup.exit_code != 0:
+            raise RuntimeError(
+                f"Failed to configure git in container {container.id}: {git_setup.output!r}"
+            )
+    except BaseException:
+        # Don't leave the container (if it was created) or its volume behind
+        stop_container(container_name)
+        if container is not None:
+            _running_container_ids.discard(container.id)
+        try:
+            testbed_volume.remove()
+        except docker.errors.NotFound:  # type: ignore
+            pass  # Already removed together with the container
+        except docker.errors.APIError as e:  # type: ignore
+            logger.warning(f"Failed to remove volume {testbed_volume.name}: {e}")
         raise
 
-    files_in_repo = list(repo_link.iterdir())
-    console.print(f"[{problem_id}] Files in repo_link: {len(files_in_repo)}, including: {files_in_repo[:5]}")
+    container_id = container.id
+    assert container_id is not None
+    logger.info(f"Started {container_id} for {problem_id}")
+
+    # Files copied into the volume keep the container's (root) ownership. Hand
+    # them to the current user from inside the container, where we already are
+    # root, instead of with sudo on the host.
+    chown = container.exec_run(
+        ["chown", "-R", f"{os.getuid()}:{os.getgid()}", "/testbed"]
+    )
+    if chown.exit_code != 0:
+        logger.warning(f"[{problem_id}] chown in container failed: {chown.output!r}")
+        set_volume_permissions(container_id, repo_link)
+
+    # Only read the first few entries rather than listing the whole directory
+    with os.scandir(repo_link) as entries:
+        files_in_repo = [entry.name for _, entry in zip(range(5), entries)]
+    logger.info(f"[{problem_id}] Files in repo_link include: {files_in_repo}")
     
 
 
    
     # List files in container for debugging
-    console.print(f"[{problem_id}] Listing files in container:")
-    subprocess.run([
-        "docker", "exec", container_id, "ls", "-la", "/testbed", "|", "head", "-n", "5"
-    ], check=False)
+    if logger.isEnabledFor(logging.DEBUG):
+        listing = container.exec_run(["ls", "-la", "/testbed"]).output
+        # Without stream=True, exec_run returns the whole output as bytes
+        assert isinstance(listing, bytes)
+        logger.debug(f"[{problem_id}] Files in container:\n{listing[:4096].decode(errors='replace')}")
     # Initialize git in the copied directory
     
     # Verify git repo validity
@@ -138,19 +462,18 @@ def start_container(workspace: Path, problem_id: str, semaphore: Any) -> str:
         capture_output=True, text=True, check=False
     )
     if git_check.returncode != 0:
-        console.print(f"[{problem_id}] Git repo is invalid: {git_check.stderr}")
+        logger.warning(f"[{problem_id}] Git repo is invalid: {git_check.stderr}")
     else:
-        console.print(f"[{problem_id}] Git repo is valid")
+        logger.info(f"[{problem_id}] Git repo is valid")
 
-    # no permission fix needed - host_testbed is already writable
-    console.print(f"[{problem_id}] Container setup COMPLETE")
+    logger.info(f"[{problem_id}] Container setup COMPLETE")
 
     #  check if we cna generate a patch
     try:
         diff = generate_patch(repo_link)
-        console.print(f"[{problem_id}] Generated patch: {diff}")
+        logger.info(f"[{problem_id}] Generated patch: {diff}")
     except Exception as e:
-        console.print(f"[{problem_id}] Failed to generate patch: {e}")
+        logger.warning(f"[{problem_id}] Failed to generate patch: {e}")
 
     return container_id
 
@@ -158,87 +481,90 @@ def start_container(workspace: Path, problem_id: str, semaphore: Any) -> str:
 def remove_container_image(image_name: str) -> None:
     """Remove a docker image."""
     try:
-        client = docker.from_env()
+        client = get_docker_client()
         client.images.remove(image=image_name, force=True)
-        console.print(f"Removed image {image_name}")
+        with _pull_lock:
+            _pull_status.pop(image_name, None)
+        logger.info(f"Removed image {image_name}")
     except docker.errors.APIError as e:  # type: ignore
-        console.print(f"Failed to remove image {image_name}: {e}")
+        logger.warning(f"Failed to remove image {image_name}: {e}")
+
+
+def chown_testbed(container_id: str) -> None:
+    """Hand the files in the container's /testbed that aren't ours yet back to the current user.
+
+    The agent's commands run as root in the container, so this must run before
+    the host reads or writes the repo after them.
+    """
+    if os.getuid() == 0:
+        return
+    uid, owner = str(os.getuid()), f"{os.getuid()}:{os.getgid()}"
+    container = get_docker_client().containers.get(container_id)
+    chown = container.exec_run(
+        ["find", "/testbed", "-not", "-uid", uid, "-exec", "chown", "-h", owner, "{}", "+"],
+        user="root",
+    )
+    if chown.exit_code != 0:
+        logger.warning(f"chown of /testbed in {container_id} failed: {chown.output!r}")
 
 
 def stop_container(container_id: str, remove_image: str = "") -> None:
     """Stop a docker container for the issue."""
     container = None
     try:
-        client = docker.from_env()
+        client = get_docker_client()
         container = client.containers.get(container_id)
     except Exception as e:
-        console.print(f"Container {container_id} not found: {e}")
+        logger.debug(f"Container {container_id} not found: {e}")
 
     if container:
+        # Volumes created by start_container for this container
+        volume_names = [
+            mount["Name"]
+            for mount in container.attrs.get("Mounts", [])
+            if mount.get("Type") == "volume"
+            and mount.get("Name", "").startswith("sweb.augment.")
+        ]
         try:
-            console.print(f"Stopping container {container_id}")
-            container.stop()
-            console.print(f"Stopped container {container_id}")
+            logger.info(f"Stopping container {container_id}")
+            # The container only runs `sleep`, so don't wait for it to exit gracefully
+            container.stop(timeout=1)
+            logger.info(f"Stopped container {container_id}")
         except docker.errors.NotFound as e:  # type: ignore
-            console.print(f"Failed to stop container {container_id}: {e}")
+            logger.warning(f"Failed to stop container {container_id}: {e}")
         except docker.errors.APIError as e:  # type: ignore
-            console.print(f"Failed to stop container {container_id}: {e}")
+            logger.warning(f"Failed to stop container {container_id}: {e}")
         try:
-            console.print(f"Removing container {container_id}")
+            logger.info(f"Removing container {container_id}")
             container.remove()
-            time.sleep(10)
-            console.print(f"Removed container {container_id}")
-        except docker.errors.NotFound as e:  # type: ignore
-            console.print(f"Failed to stop container {container_id}: {e}")
+            logger.info(f"Removed container {container_id}")
         except docker.errors.APIError as e:  # type: ignore
-            console.print(f"Failed to stop container {container_id}: {e}")
+            logger.warning(f"Failed to stop container {container_id}: {e}")
+        # Removing the /testbed volume leaves the host directory it is bound to
+        # untouched.
+        for volume_name in volume_names:
+            try:
+                get_docker_client().volumes.get(volume_name).remove()
+            except docker.errors.APIError as e:  # type: ignore
+                logger.warning(f"Failed to remove volume {volume_name}: {e}")
+
+    _running_container_ids.discard(container_id)
 
     if remove_image:
-        # Add a small delay to ensure container removal is complete
-        time.sleep(5)
         remove_container_image(remove_image)
 
 
-def setup_workspace(
-    workspace: Path, problem_id: str, lock: Any, semaphore: Any
-) -> Tuple[Dict[str, str], str]:
-    """Setup the workspace for the agent."""
-    env: Dict[str, str] = os.environ.copy()
+def stop_containers(container_ids: list[str]) -> None:
+    """Stop several docker containers in parallel."""
+    with ThreadPoolExecutor(max_workers=MAX_DOCKER_CONCURRENCY) as executor:
+        list(executor.map(stop_container, container_ids))
 
-    # Create a conda environment; we don't use it, but it protects the
-    # agent's environment from changes.
-    workspace.mkdir(parents=True, exist_ok=True)
-    
-    # Create the problem directory within the workspace to avoid nested path issues
-    problem_dir = workspace / problem_id
-    problem_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Multiple simultaneous conda installs are no good.
-    with lock:
-        subprocess.check_output(
-            [
-                "conda",
-                "create",
-                "-y",
-                "-q",
-                "-p",
-                str(workspace / "conda_3.11"),
-                "python==3.11",
-            ]
-        )
 
-    env["ISSUE_ID"] = problem_id
-    env["SWEBENCH_WORKSPACE"] = str(workspace)
-    env["PATH"] = f"{workspace}/python_wrappers/bin:{workspace}/conda_3.11/bin" + (
-        f":{env['PATH']}" if "PATH" in env else ""
-    )
-    env["PYTHONPATH"] = f"{AUGMENT_ROOT}" + (
-        f":{env['PYTHONPATH']}" if "PYTHONPATH" in env else ""
-    )
-    # for k, v in env.items():
-    #     console.print(f"ENV {k}=={v}")
+def stop_running_containers() -> None:
+    """Stop all containers started by start_container that are still running."""
+    stop_containers(list(_running_container_ids))
 
-    # Copy the python wrapper into the workspace
-    container_id = start_container(workspace, problem_id, semaphore)
 
-    return env, container_id
+def setup_workspace(workspace: Path, problem_id: str, semaphore: Any) -> str:
+    """Setup the workspace for the agent and return the ID of its container."""
+    return start_container(workspace, problem_id, semaphore)
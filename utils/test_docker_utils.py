@@ -0,0 +1,121 @@
+"""Tests for the image pull deduplication in docker_utils.py."""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils import docker_utils
+from utils.docker_utils import pull_image
+
+
+IMAGE_NAME = "swebench/sweb.eval.x86_64.astropy_1776_astropy-12907:latest"
+
+
+@pytest.fixture(autouse=True)
+def clear_pull_status():
+    """Forget the images pulled by other tests."""
+    docker_utils._pull_status.clear()
+    yield
+    docker_utils._pull_status.clear()
+
+
+def pull_concurrently(num_threads: int) -> list[Exception | None]:
+    """Call pull_image from several threads, returning what each one raised."""
+    errors: list[Exception | None] = [None] * num_threads
+
+    def pull(i: int) -> None:
+        try:
+            pull_image(IMAGE_NAME)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=pull, args=(i,)) for i in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return errors
+
+
+class TestPullImage:
+    """Tests for pull_image."""
+
+    def test_concurrent_pulls_are_coalesced(self):
+        """Test that threads pulling the same image share a single pull."""
+        release = threading.Event()
+
+        def slow_pull(image_name):
+            release.wait(timeout=10)
+
+        with patch.object(docker_utils, "_pull_image", side_effect=slow_pull) as mock_pull:
+            threading.Timer(0.1, release.set).start()
+            errors = pull_concurrently(5)
+
+        assert errors == [None] * 5
+        mock_pull.assert_called_once_with(IMAGE_NAME)
+
+    def test_pulled_image_is_not_pulled_again(self):
+        """Test that an image is only pulled once per process."""
+        with patch.object(docker_utils, "_pull_image") as mock_pull:
+            pull_image(IMAGE_NAME)
+            pull_image(IMAGE_NAME)
+
+        mock_pull.assert_called_once_with(IMAGE_NAME)
+
+    def test_failed_pull_is_retried(self):
+        """Test that a failed pull is retried by the threads waiting for it."""
+        release = threading.Event()
+        calls = []
+
+        def failing_first_pull(image_name):
+            calls.append(image_name)
+            if len(calls) == 1:
+                release.wait(timeout=10)
+                raise RuntimeError("pull failed")
+
+        with patch.object(docker_utils, "_pull_image", side_effect=failing_first_pull):
+            threading.Timer(0.1, release.set).start()
+            errors = pull_concurrently(5)
+
+        # Only the thread whose pull failed sees the error; one retry succeeds
+        assert len(calls) == 2
+        assert [str(e) for e in errors if e is not None] == ["pull failed"]
+        assert docker_utils._pull_status[IMAGE_NAME].is_set()
+
+
+def patch_docker_info(operating_system: str):
+    """Patch the Docker client to report a daemon running on operating_system."""
+    client = MagicMock()
+    client.info.return_value = {"OperatingSystem": operating_system}
+    return patch.object(docker_utils, "get_docker_client", return_value=client)
+
+
+class TestCheckLocalDockerDaemon:
+    """Tests for check_local_docker_daemon."""
+
+    def test_remote_daemon_is_rejected(self, monkeypatch):
+        """Test that a DOCKER_HOST on another machine is rejected."""
+        monkeypatch.setenv("DOCKER_HOST", "tcp://10.0.0.1:2376")
+        with pytest.raises(RuntimeError, match="remote Docker daemon"):
+            docker_utils.check_local_docker_daemon()
+
+    @pytest.mark.parametrize("system", ["Linux", "Darwin"])
+    def test_docker_desktop_is_rejected(self, monkeypatch, system):
+        """Test that Docker Desktop, whose daemon runs in a VM, is rejected."""
+        monkeypatch.delenv("DOCKER_HOST", raising=False)
+        with (
+            patch_docker_info("Docker Desktop"),
+            patch.object(docker_utils.platform, "system", return_value=system),
+            pytest.raises(RuntimeError, match="Docker Desktop"),
+        ):
+            docker_utils.check_local_docker_daemon()
+
+    def test_native_linux_daemon_is_accepted(self, monkeypatch):
+        """Test that a Docker Engine running on this Linux machine is accepted."""
+        monkeypatch.setenv("DOCKER_HOST", "unix:///var/run/docker.sock")
+        with (
+            patch_docker_info("Ubuntu 22.04.4 LTS"),
+            patch.object(docker_utils.platform, "system", return_value="Linux"),
+        ):
+            docker_utils.check_local_docker_daemon()